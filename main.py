@@ -1,5 +1,5 @@
 import pandas as pd
-from tools import optimize_schedule
+from tools import clean_schedule, optimize_schedule
 
 
 if __name__ == "__main__":
@@ -7,15 +7,17 @@ if __name__ == "__main__":
     csv_file = './data/schedule.csv'
     try:
         # Attempt to read the CSV file, skipping bad lines
-        original_schedule_df = pd.read_csv(csv_file, header=0, index_col='Name', encoding='utf-8')
-        original_schedule_df.fillna('NaN', inplace=True)
+        original_schedule_df = pd.read_csv(csv_file, header=0, index_col='Name', encoding='utf-8',
+                                           engine='pyarrow', dtype_backend='pyarrow')
+        original_schedule_df = clean_schedule(original_schedule_df)
     except pd.errors.ParserError as e:
         print(f"Error reading CSV file: {e}")
         print("Attempting to read with different encoding...")
         try:
             # Attempt to read the CSV file with a different encoding
-            original_schedule_df = pd.read_csv(csv_file, header=2, encoding='latin1', on_bad_lines='skip')
-            original_schedule_df.fillna('NaN', inplace=True)
+            original_schedule_df = pd.read_csv(csv_file, header=2, index_col='Name', encoding='latin1',
+                                               on_bad_lines='skip')
+            original_schedule_df = clean_schedule(original_schedule_df)
     
 
         except pd.errors.ParserError as e2:
@@ -29,7 +31,7 @@ if __name__ == "__main__":
     dates = list(original_schedule_df.columns)
 
     # Create the schedule - use the global variable
-    optimized_schedule = optimize_schedule(players, dates, original_schedule_df, iterations=1000)
+    optimized_schedule = optimize_schedule(players, dates, original_schedule_df, iterations=1000, n_chains=8)
 
     # Save the optimized schedule to a new CSV file
     optimized_schedule.to_csv("./data/optimized_golf_schedule.csv", index=True)
@@ -1,189 +1,442 @@
+import numpy as np
 import pandas as pd
-import random
-from collections import defaultdict
+from joblib import Parallel, delayed
+from numba import njit
 
-def generate_initial_schedule(players, dates, original_schedule_df):
+# Integer codes used for the schedule matrix, matching the category codes
+# of SCHEDULE_DTYPE
+EMPTY, SCHEDULED, EXCLUDED = 0, 1, 2
+SCHEDULE_DTYPE = pd.CategoricalDtype(['', 'S', 'X'])
+CODE_LABELS = np.array(SCHEDULE_DTYPE.categories, dtype=object)
+
+MAX_PLAYERS_PER_DATE = 4
+MAX_MATCHES_PER_PLAYER = 10
+
+# Months (April to July) in which Aidan prefers to play
+AIDAN_MONTHS = (4, 5, 6, 7)
+
+# You can adjust these weights to change the importance of each factor
+BALANCE_WEIGHT = 0.4
+ROUND_ROBIN_WEIGHT = 0.3
+AIDAN_WEIGHT = 0.3
+
+
+def clean_schedule(schedule_df):
+    """
+    Normalizes a raw schedule DataFrame to SCHEDULE_DTYPE. Cell values are
+    stripped and uppercased, and missing cells (or the legacy 'NaN'
+    sentinel) become ''.
+
+    Args:
+        schedule_df (pd.DataFrame): The schedule data as read from the CSV.
+
+    Returns:
+        pd.DataFrame: The schedule with every column of SCHEDULE_DTYPE.
+
+    Raises:
+        ValueError: If a cell holds anything other than 'S', 'X' or empty.
+    """
+    cleaned = (schedule_df.astype(object)
+               .map(lambda value: '' if pd.isna(value) else str(value).strip().upper())
+               .replace('NAN', ''))
+    unexpected = sorted(set(cleaned.to_numpy().ravel()) - set(SCHEDULE_DTYPE.categories))
+    if unexpected:
+        raise ValueError(f"Unexpected schedule values {unexpected}; "
+                         "expected 'S', 'X' or an empty cell")
+    return cleaned.astype(SCHEDULE_DTYPE)
+
+
+def encode_schedule(schedule_df):
+    """
+    Converts a schedule DataFrame of 'S', 'X' and empty values into an int8
+    code matrix (EMPTY=0, SCHEDULED=1, EXCLUDED=2). Columns already of
+    SCHEDULE_DTYPE are read straight from their category codes; anything
+    else goes through clean_schedule first.
+
+    Args:
+        schedule_df (pd.DataFrame): The schedule data.
+
+    Returns:
+        np.ndarray: int8 matrix of shape (players, dates).
+    """
+    if not (schedule_df.dtypes == SCHEDULE_DTYPE).all():
+        schedule_df = clean_schedule(schedule_df)
+    codes = (schedule_df.apply(lambda col: col.cat.codes)
+             .to_numpy(np.int8, copy=True))
+    # Missing cells are treated as empty
+    codes[codes < 0] = EMPTY
+    return np.ascontiguousarray(codes)
+
+
+def decode_schedule(codes, players, dates):
+    """
+    Converts an int8 code matrix back into a schedule DataFrame.
+
+    Args:
+        codes (np.ndarray): int8 matrix of shape (players, dates).
+        players (list or pd.Index): Player names. Pass the original
+            schedule's index to keep its name (e.g. 'Name').
+        dates (list): List of date columns.
+
+    Returns:
+        pd.DataFrame: The schedule data.
+    """
+    return pd.DataFrame(CODE_LABELS[codes], index=players, columns=dates)
+
+
+@njit(cache=True)
+def _fill_schedule_nb(codes, order, row_s, col_s):
+    """
+    Fills the empty slots listed in order (linear indices into codes) with
+    'S' while both the per-date and per-player caps allow it, and 'X'
+    otherwise. row_s and col_s are updated in place.
+    """
+    n_dates = codes.shape[1]
+    for i in range(order.shape[0]):
+        r, c = divmod(order[i], n_dates)
+        if codes[r, c] != EMPTY:
+            continue
+        if col_s[c] < MAX_PLAYERS_PER_DATE and row_s[r] < MAX_MATCHES_PER_PLAYER:
+            codes[r, c] = SCHEDULED
+            row_s[r] += 1
+            col_s[c] += 1
+        else:
+            codes[r, c] = EXCLUDED
+
+
+def generate_initial_schedule(codes, row_s_counts, col_s_counts, rng):
     """
     Generates a random initial schedule, ensuring each player plays a similar
     number of matches, AND takes into account existing 'S' and 'X' values
     from the original schedule.
 
+    The code matrix and both count vectors are updated in place.
+
     Args:
-        players (list): List of player names.
-        dates (list): List of date columns.
-        original_schedule_df (pd.DataFrame): DataFrame containing the original schedule.
+        codes (np.ndarray): int8 code matrix of the original schedule.
+        row_s_counts (np.ndarray): Number of 'S' per player.
+        col_s_counts (np.ndarray): Number of 'S' per date.
+        rng (np.random.Generator): Random number generator.
 
     Returns:
-        pd.DataFrame: DataFrame with the initial schedule.
-    """
-    schedule = original_schedule_df.copy()
-
-    # Create a list of (player, date) combinations, excluding those already filled
-    player_dates = []
-    for player in players:
-        for date in dates:
-            if schedule.loc[player, date] == 'NaN':  # Only consider empty slots
-                player_dates.append((player, date))
-    random.shuffle(player_dates)  # Shuffle for randomness
-
-    for player, date in player_dates:
-      if 'S' in schedule[date].values:
-        if schedule[date].value_counts()['S'] < 4:
-          if schedule.loc[player, date] == 'NaN' and schedule.loc[player].value_counts()['S'] <= 9:
-            schedule.loc[player, date] = 'S'
-          elif schedule.loc[player, date] == 'NaN' and schedule.loc[player].value_counts()['S'] > 9:
-            schedule.loc[player, date] = 'X'
-        else:
-          for player in players:
-            if schedule.loc[player, date] == 'NaN':
-              schedule.loc[player, date] = 'X'
-      else:
-        schedule.loc[player, date] = 'S'
-      
+        np.ndarray: The filled code matrix.
+    """
+    # Shuffle the linear indices of the slots that are still empty
+    order = rng.permutation(np.flatnonzero(codes == EMPTY))
 
-    return schedule
+    _fill_schedule_nb(codes, order, row_s_counts, col_s_counts)
+    return codes
 
 
 
-def calculate_round_robbin_score(schedule, players):
+def calculate_round_robbin_score(codes, n_players):
     """
     Calculates a score based on how close the schedule is to a round-robin format.
     A higher score indicates that players have played with each other more.
 
     Args:
-        schedule (pd.DataFrame): The schedule data.
-        players (list): List of player names
+        codes (np.ndarray): int8 code matrix of the schedule.
+        n_players (int): Number of players.
 
     Returns:
-        int: The round-robin score.
-    """
-    played_with_counts = {player: defaultdict(int) for player in players}
-    total_pairs = 0
-    possible_pairs = len(players) * (len(players) -1) / 2
-
-    for date in schedule.columns:
-        # Get the players scheduled on this date
-        scheduled_players = [player for player in players if schedule.loc[player, date] == 'S']
-        # Iterate through all unique pairs of players
-        for i in range(len(scheduled_players)):
-            for j in range(i + 1, len(scheduled_players)):
-                player1 = scheduled_players[i]
-                player2 = scheduled_players[j]
-                # Increment the count for each player having played with the other
-                played_with_counts[player1][player2] += 1
-                played_with_counts[player2][player1] += 1
-                total_pairs += 1
-
-    # Calculate a score based on the distribution of "played with" counts
-    round_robin_score = 0
-    for player in players:
-        for other_player in players:
-            if player != other_player:
-                round_robin_score += played_with_counts[player][other_player]
+        float: The round-robin score.
+    """
+    possible_pairs = n_players * (n_players - 1) / 2
+
+    # played_with[i, j] is the number of dates players i and j are both scheduled
+    scheduled = (codes == SCHEDULED).astype(np.int32)
+    played_with = np.matmul(scheduled, scheduled.T)
+
+    round_robin_score = played_with.sum() - np.trace(played_with)
     return round_robin_score / possible_pairs # Normalize
 
 
-def calculate_balance_score(schedule, players):
+def calculate_aidan_score(codes, aidan_row, month_mask):
     """
-    Calculates a score based on how balanced the schedule is in terms of
-    the number of matches played by each player.
+    Calculates a score based on how many of Aidan's matches are scheduled
+    in his preferred months (AIDAN_MONTHS: April, May, June and July).
 
     Args:
-        schedule (pd.DataFrame): The schedule data.
-        players (list): List of player names.
+        codes (np.ndarray): int8 code matrix of the schedule.
+        aidan_row (int): Row index of Aidan in the code matrix.
+        month_mask (np.ndarray): Boolean mask of the dates in Aidan's months.
 
     Returns:
-        int: The balance score.
-    """
-    player_match_counts = {player: 0 for player in players}
-    for player in players:
-        for date in schedule.columns:
-            if schedule.loc[player, date] == 'S':
-                player_match_counts[player] += 1
-
-    # Calculate the standard deviation of match counts
-    match_counts = list(player_match_counts.values())
-    if len(match_counts) > 0:
-      std_dev = pd.Series(match_counts).std()
-    else:
-      std_dev = 0
-    # A lower standard deviation means a more balanced schedule, so subtract
-    # it from a maximum value (number of dates) to get a positive score
-    balance_score = len(schedule.columns) - std_dev
-    return balance_score
+        int: The Aidan score.
+    """
+    return int(((codes[aidan_row] == SCHEDULED) & month_mask).sum())
 
-def calculate_aidan_score(schedule, players, dates):
+def calculate_score_components(codes, aidan_row, month_mask):
     """
-    Calculates a score based on how many of Aidan's matches are scheduled
-    in May, June, and July.
+    Calculates the round-robin, balance and Aidan scores of the schedule in
+    a single pass with calculate_score_components_nb.
 
     Args:
-        schedule (pd.DataFrame): The schedule data.
-        players (list): List of player names.
-        dates (list): List of date columns.
+        codes (np.ndarray): int8 code matrix of the schedule.
+        aidan_row (int): Row index of Aidan in the code matrix.
+        month_mask (np.ndarray): Boolean mask of the dates in Aidan's months.
 
     Returns:
-        int: The Aidan score.
+        tuple: The round-robin score, the balance score and the Aidan score.
     """
-    aidan_score = 0
-    dt_dates = pd.to_datetime(dates, format='%d-%b')
-    for date, dt_date in list(zip(dates, dt_dates)):
-        if dt_date.month in [4, 5, 6, 7] and schedule.loc['Aidan', date] == 'S':
-            aidan_score += 1
-    return aidan_score
+    round_robin_score, balance_score, aidan_score = calculate_score_components_nb(
+        np.ascontiguousarray(codes, dtype=np.int8),
+        int(aidan_row),
+        np.ascontiguousarray(month_mask, dtype=np.bool_))
+    return round_robin_score, balance_score, int(aidan_score)
 
-def calculate_total_score(schedule, players, dates):
+def calculate_total_score(codes, aidan_row, month_mask):
     """
     Calculates a weighted total score for the schedule, considering
     balance, round-robin, and Aidan's preferences.
 
     Args:
-        schedule (pd.DataFrame): The schedule data.
-        players (list): List of player names.
-        dates (list): List of date columns.
+        codes (np.ndarray): int8 code matrix of the schedule.
+        aidan_row (int): Row index of Aidan in the code matrix.
+        month_mask (np.ndarray): Boolean mask of the dates in Aidan's months.
 
     Returns:
         float: The total score.
     """
-    round_robin_score = calculate_round_robbin_score(schedule, players)
-    balance_score = calculate_balance_score(schedule, players)
-    aidan_score = calculate_aidan_score(schedule, players, dates)
+    round_robin_score, balance_score, aidan_score = calculate_score_components(
+        codes, aidan_row, month_mask)
+    return _weighted_score(round_robin_score, balance_score, aidan_score)
+
+def _weighted_score(round_robin_score, balance_score, aidan_score):
+    """
+    Combines the three scores using the module-level weights.
+    """
+    return (BALANCE_WEIGHT * balance_score
+            + ROUND_ROBIN_WEIGHT * round_robin_score
+            + AIDAN_WEIGHT * aidan_score)
 
-    # You can adjust these weights to change the importance of each factor
-    total_score = (0.4 * balance_score + 0.3 * round_robin_score + 0.3 * aidan_score)
-    return total_score
+@njit(cache=True)
+def _balance_from_moments(n_dates, n_players, total, total_sq):
+    """
+    Calculates a score based on how balanced the schedule is in terms of
+    the number of matches played by each player, from the sum and sum of
+    squares of the per-player match counts. A lower sample standard
+    deviation (ddof=1) means a more balanced schedule, so it is subtracted
+    from the number of dates to get a positive score.
+    """
+    if n_players < 2:
+        return float(n_dates)
+    variance = (total_sq - total * total / n_players) / (n_players - 1)
+    return n_dates - np.sqrt(max(variance, 0.0))
 
-def optimize_schedule(players, dates, original_schedule_df, iterations=1000):
+@njit('UniTuple(float64, 3)(int8[:, ::1], int64, boolean[::1])', cache=True, fastmath=True)
+def calculate_score_components_nb(codes, aidan_row, month_mask):
+    """
+    Computes the round-robin, balance and Aidan scores in a single pass over
+    a C-contiguous code matrix. See calculate_score_components.
     """
-    Optimizes the golf schedule by generating random variations and
-    selecting the one with the highest total score.
+    n_players, n_dates = codes.shape
+    row_s = np.zeros(n_players, np.int32)
+    played_with = np.zeros((n_players, n_players), np.int32)
+    scheduled = np.empty(n_players, np.int64)
+    aidan_score = 0
+
+    for c in range(n_dates):
+        k = 0
+        for r in range(n_players):
+            if codes[r, c] == SCHEDULED:
+                scheduled[k] = r
+                k += 1
+                row_s[r] += 1
+        for i in range(k):
+            for j in range(i + 1, k):
+                played_with[scheduled[i], scheduled[j]] += 1
+                played_with[scheduled[j], scheduled[i]] += 1
+        if month_mask[c] and codes[aidan_row, c] == SCHEDULED:
+            aidan_score += 1
+
+    possible_pairs = n_players * (n_players - 1) / 2
+    round_robin_score = played_with.sum() / possible_pairs
+
+    total = 0
+    total_sq = 0
+    for r in range(n_players):
+        total += row_s[r]
+        total_sq += row_s[r] * row_s[r]
+    balance_score = _balance_from_moments(n_dates, n_players, total, total_sq)
+
+    return round_robin_score, balance_score, float(aidan_score)
+
+def _improve_aidan(work, row_s, free, aidan_row, month_mask, max_sweeps):
+    """
+    Greedily moves Aidan onto dates in his preferred months by swapping his
+    free 'X' with the free 'S' of the busiest other player on that date.
+    A swap is only made if it does not worsen the balance score, i.e. the
+    other player has more matches than Aidan. Stops after max_sweeps sweeps
+    or at the first sweep that makes no swap.
+
+    Returns:
+        tuple: Number of swaps made (the gain in Aidan score) and the change
+            in the sum of squared match counts.
+    """
+    gained = 0
+    sq_delta = 0
+    for _ in range(max_sweeps):
+        improved = False
+        for c in np.flatnonzero(month_mask & free[aidan_row] & (work[aidan_row] == EXCLUDED)):
+            if row_s[aidan_row] >= MAX_MATCHES_PER_PLAYER:
+                return gained, sq_delta
+            s_rows = np.flatnonzero(free[:, c] & (work[:, c] == SCHEDULED))
+            if len(s_rows) == 0:
+                continue
+            r = s_rows[np.argmax(row_s[s_rows])]
+            if row_s[r] <= row_s[aidan_row]:
+                continue
+            work[r, c], work[aidan_row, c] = EXCLUDED, SCHEDULED
+            sq_delta += 2 * (int(row_s[aidan_row]) - int(row_s[r])) + 2
+            row_s[r] -= 1
+            row_s[aidan_row] += 1
+            gained += 1
+            improved = True
+        if not improved:
+            break
+    return gained, sq_delta
+
+def _anneal(orig_codes, aidan_row, month_mask, iterations, initial_temperature,
+            cooling_rate, local_search_iters, seed, verbose=False):
+    """
+    Runs one simulated annealing chain from a random initial schedule.
+
+    Returns:
+        tuple: The best score and its int8 code matrix.
+    """
+    orig_row_s = (orig_codes == SCHEDULED).sum(axis=1)
+    orig_col_s = (orig_codes == SCHEDULED).sum(axis=0)
+    free = orig_codes == EMPTY
+    n_players, n_dates = orig_codes.shape
+
+    rng = np.random.default_rng(seed)
+    work = orig_codes.copy()
+    row_s = orig_row_s.astype(np.int32)
+    col_s = orig_col_s.astype(np.int32)
+    generate_initial_schedule(work, row_s, col_s, rng)
+
+    # Swaps keep the total number of matches, so the balance score only
+    # needs the running sum of squared match counts
+    total_s = int(row_s.sum())
+    total_sq = int((row_s.astype(np.int64) ** 2).sum())
+
+    round_robin_score, balance_score, aidan_score = calculate_score_components(
+        work, aidan_row, month_mask)
+    current_score = _weighted_score(round_robin_score, balance_score, aidan_score)
+
+    best_codes = work.copy()
+    best_score = current_score
+    temperature = initial_temperature
+
+    for i in range(iterations):
+        if verbose and (i + 1) % 100 == 0:
+            print(f"Iteration: {i + 1}/{iterations}")
+        temperature *= cooling_rate
+
+        # Propose swapping a free 'S' with a free 'X' on a random date
+        c = rng.integers(n_dates)
+        s_rows = np.flatnonzero(free[:, c] & (work[:, c] == SCHEDULED))
+        x_rows = np.flatnonzero(free[:, c] & (work[:, c] == EXCLUDED)
+                                & (row_s < MAX_MATCHES_PER_PLAYER))
+        if len(s_rows) == 0 or len(x_rows) == 0:
+            continue
+        r1 = s_rows[rng.integers(len(s_rows))]
+        r2 = x_rows[rng.integers(len(x_rows))]
+
+        sq_delta = 2 * (int(row_s[r2]) - int(row_s[r1])) + 2
+        work[r1, c], work[r2, c] = EXCLUDED, SCHEDULED
+        row_s[r1] -= 1
+        row_s[r2] += 1
+
+        # Each date with k players adds k * (k - 1) to the round-robin sum, so a
+        # same-date S/X swap leaves the round-robin score unchanged
+        new_balance = _balance_from_moments(n_dates, n_players, total_s, total_sq + sq_delta)
+        new_aidan = aidan_score
+        if month_mask[c] and r1 == aidan_row:
+            new_aidan -= 1
+        elif month_mask[c] and r2 == aidan_row:
+            new_aidan += 1
+        delta = (BALANCE_WEIGHT * (new_balance - balance_score)
+                 + AIDAN_WEIGHT * (new_aidan - aidan_score))
+
+        if delta > 0 or rng.random() < np.exp(delta / temperature):
+            balance_score, aidan_score = new_balance, new_aidan
+            current_score += delta
+            total_sq += sq_delta
+
+            gained, sq_delta = _improve_aidan(work, row_s, free, aidan_row, month_mask,
+                                              local_search_iters)
+            if gained:
+                total_sq += sq_delta
+                new_balance = _balance_from_moments(n_dates, n_players, total_s, total_sq)
+                current_score += (BALANCE_WEIGHT * (new_balance - balance_score)
+                                  + AIDAN_WEIGHT * gained)
+                balance_score = new_balance
+                aidan_score += gained
+            if current_score > best_score:
+                best_score = current_score
+                np.copyto(best_codes, work)
+        else:
+            # Revert the move
+            work[r1, c], work[r2, c] = SCHEDULED, EXCLUDED
+            row_s[r1] += 1
+            row_s[r2] -= 1
+
+    return best_score, best_codes
+
+def optimize_schedule(players, dates, original_schedule_df, iterations=1000,
+                      initial_temperature=1.0, cooling_rate=0.995, local_search_iters=5,
+                      seed=None, n_chains=1, n_jobs=-1):
+    """
+    Optimizes the golf schedule with simulated annealing. Starting from one
+    random schedule, each iteration swaps an 'S' and an 'X' between two
+    players on the same date and keeps the move according to the Metropolis
+    criterion. Slots fixed in the original schedule are never moved.
+    Independent chains can be run in parallel, keeping the best result.
 
     Args:
         players (list): List of player names.
         dates (list): List of date columns.
         original_schedule_df (pd.DataFrame): The original schedule
-        iterations (int, optional): Number of optimization iterations.
-            Defaults to 1000.
+        iterations (int, optional): Number of optimization iterations per
+            chain. Defaults to 1000.
+        initial_temperature (float, optional): Starting temperature.
+            Defaults to 1.0.
+        cooling_rate (float, optional): Factor applied to the temperature
+            after each iteration. Defaults to 0.995.
+        local_search_iters (int, optional): Maximum number of greedy sweeps
+            moving Aidan into his preferred months after each accepted move.
+            Defaults to 5.
+        seed (int, optional): Seed for the random number generator. Chain i
+            is seeded with seed + i.
+        n_chains (int, optional): Number of independent chains. Defaults to 1.
+        n_jobs (int, optional): Number of parallel workers used by joblib.
+            Defaults to -1 (all cores).
 
     Returns:
         pd.DataFrame: The optimized schedule.
     """
-    best_schedule = None
-    best_score = -1
-    print("Starting optimization...")
+    orig_codes = encode_schedule(original_schedule_df)
 
-    for i in range(iterations):
-        if (i + 1) % 100 == 0:
-            print(f"Iteration: {i + 1}/{iterations}")
-        # Generate a new random schedule on each iteration
-        current_schedule = generate_initial_schedule(players, dates, original_schedule_df) # Pass the original schedule
-        current_score = calculate_total_score(current_schedule, players, dates)
+    aidan_row = players.index('Aidan')
+    month_mask = np.isin(pd.to_datetime(dates, format='%d-%b').month, AIDAN_MONTHS)
 
-        if current_score > best_score:
-            best_score = current_score
-            best_schedule = current_schedule.copy()
-
-    print("Optimization complete. Best score:", best_score)
-    return best_schedule
+    if seed is None:
+        seed = int(np.random.SeedSequence().generate_state(1)[0])
+    print("Starting optimization...")
 
+    if n_chains == 1:
+        best_score, best_codes = _anneal(orig_codes, aidan_row, month_mask, iterations,
+                                         initial_temperature, cooling_rate,
+                                         local_search_iters, seed, verbose=True)
+    else:
+        # Each chain sends back only its int8 code matrix (P x D bytes)
+        results = Parallel(n_jobs=n_jobs)(
+            delayed(_anneal)(orig_codes, aidan_row, month_mask, iterations,
+                             initial_temperature, cooling_rate, local_search_iters, seed + i)
+            for i in range(n_chains))
+        best_score, best_codes = max(results, key=lambda result: result[0])
 
+    print("Optimization complete. Best score:", best_score)
+    return decode_schedule(best_codes, original_schedule_df.index, dates)